@@ -104,7 +104,7 @@ class Builder(object):
                 continue
 
             for prop in sa.inspect(cls).iterate_properties:
-                if prop.key == "versions":
+                if prop.key == "versions" or not isinstance(prop, sa.orm.RelationshipProperty):
                     continue
                 builder = RelationshipBuilder(self.manager, cls, prop)
                 builder()
@@ -147,6 +147,7 @@ class Builder(object):
         6. Assign all versioned attributes to use active history.
         7. Add Association proxy for Versioned Models.
         8. Add Hybrid Property to Versioned Model
+        9. Collect tables whose operations are tracked from executed SQL.
         """
         if not self.manager.options["versioning"]:
             return
@@ -156,6 +157,7 @@ class Builder(object):
 
         if not self.manager.options["create_models"]:
             self.manager.pending_classes = []
+            self.manager.update_sql_tracked_table_names()
             return
 
         self.build_models()
@@ -169,6 +171,7 @@ class Builder(object):
         self.create_column_aliases(pending_classes_copies)
         self.create_association_proxies(pending_classes_copies)
         self.create_hybrid_properties(pending_classes_copies)
+        self.manager.update_sql_tracked_table_names()
 
     def enable_active_history(self, version_classes):
         """
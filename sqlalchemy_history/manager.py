@@ -88,6 +88,7 @@ class VersioningManager(object):
             "operation_type_column_name": "operation_type",
             "strategy": "validity",
             "use_module_name": False,
+            "versions_lazy": "dynamic",
         }
         if plugins is None:
             self.plugins = []
@@ -136,6 +137,10 @@ class VersioningManager(object):
         self.version_table_map = {}  # Key is the parent table, Value is the version table
         self.declarative_base = None
         self.version_class_map = {}  # Key is the parent model, Value is the version model
+        self.version_bases = {}  # Key is the tuple of base classes, Value is the abstract VersionBase
+        # Names of versioned tables which are not mapped by a versioned class, these are tracked by
+        # `track_sql_operations`. Populated by the builder once version classes are configured.
+        self.sql_tracked_table_names = set()
         self.session_listeners = {
             "before_flush": self.before_flush,
             "after_flush": self.after_flush,
@@ -418,6 +423,26 @@ class VersioningManager(object):
                 ):  # ConnectionFairy is the same - this is a clone
                     self.units_of_work[c] = uow
 
+    def update_sql_tracked_table_names(self):
+        """Collect the names of versioned tables whose operations are tracked by `track_sql_operations`.
+
+        ORM tables are tracked using `mapper_listeners`, so only versioned tables which do not have a
+        versioned mapper are collected. This is computed once after version classes are configured
+        instead of for every executed statement.
+        """
+        orm_tracked_tables = {
+            c.__table__
+            for c in self.version_class_map
+            # NOTE: We add hasattr(c, '__table__') cause some ORM may not have a physical table
+            #  associated to them
+            if hasattr(c, "__table__")
+        }
+        self.sql_tracked_table_names = {
+            table.name if not table.schema else table.schema + "." + table.name
+            for table in self.version_table_map
+            if table not in orm_tracked_tables
+        }
+
     def track_sql_operations(self, conn, cursor, statement, parameters, context, executemany):
         """
         This function tracks all SQLoperators directly done by the sqlalchemy cursor.
@@ -451,20 +476,6 @@ class VersioningManager(object):
                 if context.invoked_statement.table.schema
                 else context.invoked_statement.table.name
             )
-            # ORM tables are tracked using `mapper_listeners`. We only need to track table which do not
-            #  have mappers here
-            orm_tracked_tables = {
-                c.__table__
-                for c in self.version_class_map
-                # NOTE: We add hasattr(c, '__table__') cause some ORM may not have a physical table
-                #  associated to them
-                if hasattr(c, "__table__")
-            }
-            table_names = [
-                table.name if not table.schema else table.schema + "." + table.name
-                for table in self.version_table_map
-                if table not in orm_tracked_tables
-            ]
-            if table_name in table_names:
+            if table_name in self.sql_tracked_table_names:
                 for params in context.compiled_parameters:
                     self.append_association_operation(conn, table_name, params, op)
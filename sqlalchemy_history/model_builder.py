@@ -59,11 +59,13 @@ def version_base(manager, parent_cls, base_class_factory=None):
     VersionBase = find_closest_versioned_parent(manager, parent_cls)
 
     if not VersionBase:
-        VersionBase = type(
-            "VersionBase",
-            (base_class_factory(manager, parent_cls) + (VersionClassBase,)),
-            {"__abstract__": True},
-        )
+        bases = base_class_factory(manager, parent_cls) + (VersionClassBase,)
+        # Version classes sharing the same base classes also share the abstract VersionBase
+        # instead of building an identical one for each of them.
+        VersionBase = manager.version_bases.get(bases)
+        if VersionBase is None:
+            VersionBase = type("VersionBase", bases, {"__abstract__": True})
+            manager.version_bases[bases] = VersionBase
 
     return VersionBase
 
@@ -126,7 +128,7 @@ class ModelBuilder(object):
                 primaryjoin=sa.and_(*conditions),
                 foreign_keys=foreign_keys,
                 order_by=lambda: getattr(self.version_class, option(self.model, "transaction_column_name")),
-                lazy="dynamic",
+                lazy=option(self.model, "versions_lazy"),
                 viewonly=True,
             )
             # We must explicitly declare this relationship, instead of
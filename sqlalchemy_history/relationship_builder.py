@@ -336,6 +336,11 @@ class RelationshipBuilder(object):
         except ClassNotVersioned:
             self.remote_cls = self.property.mapper.class_
 
+        if self.versioned and self.property.viewonly and self.property.secondary is not None:
+            # Viewonly many-to-many relationships don't get an association version table, so there is
+            # nothing to reflect them through when the remote class is versioned.
+            return
+
         if (
             self.property.secondary is not None
             and not self.property.viewonly
@@ -1,10 +1,10 @@
+from contextlib import contextmanager
 from copy import copy
 import inspect
 import itertools as it
 import os
 import pytest
 import sqlalchemy as sa
-from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, column_property, close_all_sessions, declarative_base
 from sqlalchemy_history import (
     ClassNotVersioned,
@@ -75,17 +75,10 @@ class TestCase(object):
         yield
 
     @pytest.fixture
-    def setup_engine(self, setup_versioning):
-        if "DB" not in os.environ:  # pragma: no cover
-            # NOTE: We set DB environment variable explicitly if someone has not provided as this value
-            #       is used to skip other test cases and if one doesn't specifiy this value tests starts
-            #       breaking. We don't cover this in coverage as our CI always
-            #       specifies DB variable
-            os.environ["DB"] = "sqlite"
+    def setup_engine(self, setup_versioning, engine):
         self.driver = os.environ.get("DB")
-        self.engine = create_engine(get_dns_from_driver(self.driver))
+        self.engine = engine
         yield
-        self.engine.dispose()
 
     @pytest.fixture
     def setup_models(self, setup_engine):
@@ -142,6 +135,26 @@ class TestCase(object):
         with self.connection.begin():
             self.Model.metadata.drop_all(self.connection)
 
+    @contextmanager
+    def bounded_queries(self, max_queries):
+        """Assert that the wrapped block executes at most `max_queries` SQL statements.
+
+        Used to guard against accidentally reintroducing N+1 queries when traversing versions.
+        """
+        query_count = len(QueryPool.queries)
+        yield
+        executed = len(QueryPool.queries) - query_count
+        assert executed <= max_queries, "Expected at most %d queries, got %d" % (max_queries, executed)
+
+    def bump_version(self):
+        """Flush the session and start a new versioning transaction without committing.
+
+        This allows creating multiple versions of the same objects within one database transaction,
+        for tests which only care about the ordering of versions and not about actual commits.
+        """
+        self.session.flush()
+        versioning_manager.unit_of_work(self.session).reset(self.session)
+
     def create_models(self):
         class Article(self.Model):
             __tablename__ = "article"
@@ -8,6 +8,9 @@ class TestVersionModelBuilder(TestCase):
     def test_parent_has_access_to_versioning_manager(self):
         assert self.Article.__versioning_manager__
 
+    def test_version_classes_share_version_base(self):
+        assert self.ArticleVersion.__bases__ == self.TagVersion.__bases__
+
 
 class TestGenericReprModelBuilder(TestCase):
     @property
@@ -0,0 +1,34 @@
+import os
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.pool import StaticPool
+
+from tests import get_dns_from_driver
+
+
+@pytest.fixture(scope="module")
+def engine():
+    """Engine shared by all the tests of a module.
+
+    Tables are still created and dropped by every test, only the engine and its pooled
+    connections are reused. For sqlite a `StaticPool` keeps the single in-memory database
+    connection alive for the whole module.
+    """
+    if "DB" not in os.environ:  # pragma: no cover
+        # NOTE: We set DB environment variable explicitly if someone has not provided as this value
+        #       is used to skip other test cases and if one doesn't specifiy this value tests starts
+        #       breaking. We don't cover this in coverage as our CI always
+        #       specifies DB variable
+        os.environ["DB"] = "sqlite"
+    driver = os.environ["DB"]
+    if driver == "sqlite":
+        engine = create_engine(
+            get_dns_from_driver(driver),
+            poolclass=StaticPool,
+            connect_args={"check_same_thread": False},
+        )
+    else:  # pragma: no cover
+        engine = create_engine(get_dns_from_driver(driver))
+    yield engine
+    engine.dispose()
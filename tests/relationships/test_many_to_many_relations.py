@@ -2,56 +2,147 @@ import datetime
 import os
 
 import sqlalchemy as sa
-from pytest import mark
+from pytest import fixture, mark
 from sqlalchemy_history import versioning_manager
 
 
-from tests import TestCase, create_test_cases
+from tests import QueryPool, TestCase, create_test_cases
 
+# Shared by the association tables built for every test instead of a new function element each time
+CURRENT_TIMESTAMP = sa.func.current_timestamp()
 
-class ManyToManyRelationshipsTestCase(TestCase):
-    def create_models(self):
-        class Article(self.Model):
-            __tablename__ = "article"
-            __versioned__ = {"base_classes": (self.Model,)}
 
-            id = sa.Column(
-                sa.Integer, sa.Sequence(f"{__tablename__}_seq", start=1), autoincrement=True, primary_key=True
-            )
-            name = sa.Column(sa.Unicode(255))
+@fixture(scope="module")
+def setup_other_schema(engine):
+    with engine.connect() as connection:
+        try:
+            connection.execute(sa.text("DROP SCHEMA IF EXISTS other"))
+            connection.execute(sa.text("CREATE SCHEMA other"))
+        except sa.exc.DatabaseError:  # pragma: no cover
+            try:
+                # Create a User for Oracle DataBase as it does not have concept of schema
+                # ref: https://stackoverflow.com/questions/10994414/missing-authorization-clause-while-creating-schema # noqa E501
+                connection.execute(sa.text("CREATE USER other identified by other"))
+                # need to give privilege to create table to this new user
+                # ref: https://stackoverflow.com/questions/27940522/no-privileges-on-tablespace-users
+                connection.execute(sa.text("GRANT UNLIMITED TABLESPACE TO other"))
+            except sa.exc.DatabaseError as dbe:
+                if (
+                    "ORA-01920: user name 'OTHER' conflicts with another user or role name"
+                    not in dbe.__str__()
+                ):
+                    # NOTE: prior to oracle 23c we don't have concept of if not exists
+                    #       so we just try to create if fails we continue
+                    raise
+        finally:
+            connection.commit()
+    yield
 
-        article_tag = sa.Table(
-            "article_tag",
-            self.Model.metadata,
-            sa.Column(
-                "article_id",
-                sa.Integer,
-                sa.ForeignKey("article.id"),
-                primary_key=True,
-            ),
-            sa.Column("tag_id", sa.Integer, sa.ForeignKey("tag.id"), primary_key=True),
-            sa.Column(
-                "created_date",
-                sa.DateTime,
-                nullable=False,
-                server_default=sa.func.current_timestamp(),
-                default=lambda: datetime.datetime.now(datetime.timezone.utc),
-            ),
-        )
 
-        class Tag(self.Model):
-            __tablename__ = "tag"
-            __versioned__ = {"base_classes": (self.Model,)}
+def create_article_tag_models(Model, schema=None, viewonly=False):
+    """Build the `Article` and `Tag` models shared by the many-to-many test cases.
 
-            id = sa.Column(
-                sa.Integer, sa.Sequence(f"{__tablename__}_seq", start=1), autoincrement=True, primary_key=True
-            )
-            name = sa.Column(sa.Unicode(255))
+    :param Model: declarative base to build the models with
+    :param schema: schema to place all the tables in
+    :param viewonly: whether `Tag.articles` should be a viewonly relationship
+    :returns: tuple of `Article` class, `Tag` class and `article_tag` association table
+    """
+    prefix = f"{schema}." if schema else ""
+
+    class Article(Model):
+        __tablename__ = "article"
+        __versioned__ = {"base_classes": (Model,)}
+        __table_args__ = {"schema": schema}
+
+        id = sa.Column(
+            sa.Integer, sa.Sequence(f"{__tablename__}_seq", start=1), autoincrement=True, primary_key=True
+        )
+        name = sa.Column(sa.Unicode(255))
+
+    article_tag = sa.Table(
+        "article_tag",
+        Model.metadata,
+        sa.Column(
+            "article_id",
+            sa.Integer,
+            sa.ForeignKey(f"{prefix}article.id"),
+            primary_key=True,
+        ),
+        sa.Column("tag_id", sa.Integer, sa.ForeignKey(f"{prefix}tag.id"), primary_key=True),
+        sa.Column(
+            "created_date",
+            sa.DateTime,
+            nullable=False,
+            server_default=CURRENT_TIMESTAMP,
+            default=lambda: datetime.datetime.now(datetime.timezone.utc),
+        ),
+        schema=schema,
+    )
+
+    class Tag(Model):
+        __tablename__ = "tag"
+        __versioned__ = {"base_classes": (Model,)}
+        __table_args__ = {"schema": schema}
+
+        id = sa.Column(
+            sa.Integer, sa.Sequence(f"{__tablename__}_seq", start=1), autoincrement=True, primary_key=True
+        )
+        name = sa.Column(sa.Unicode(255))
 
+    if viewonly:
+        Tag.articles = sa.orm.relationship(Article, secondary=article_tag, viewonly=True)
+    else:
         Tag.articles = sa.orm.relationship(Article, secondary=article_tag, backref="tags")
 
-        self.Article = Article
-        self.Tag = Tag
+    return Article, Tag, article_tag
+
+
+def create_self_referential_article_models(Model, schema=None):
+    """Build the self referential `Article` model shared by the many-to-many test cases.
+
+    :param Model: declarative base to build the model with
+    :param schema: schema to place all the tables in
+    :returns: tuple of `Article` class and `article_references` association table
+    """
+    prefix = f"{schema}." if schema else ""
+
+    class Article(Model):
+        __tablename__ = "article"
+        __versioned__ = {}
+        __table_args__ = {"schema": schema}
+
+        id = sa.Column(
+            sa.Integer, sa.Sequence(f"{__tablename__}_seq", start=1), autoincrement=True, primary_key=True
+        )
+        name = sa.Column(sa.Unicode(255))
+
+    article_references = sa.Table(
+        "article_references",
+        Model.metadata,
+        sa.Column(
+            "referring_id",
+            sa.Integer,
+            sa.ForeignKey(f"{prefix}article.id"),
+            primary_key=True,
+        ),
+        sa.Column("referred_id", sa.Integer, sa.ForeignKey(f"{prefix}article.id"), primary_key=True),
+        schema=schema,
+    )
+
+    Article.references = sa.orm.relationship(
+        Article,
+        secondary=article_references,
+        primaryjoin=Article.id == article_references.c.referring_id,
+        secondaryjoin=Article.id == article_references.c.referred_id,
+        backref="cited_by",
+    )
+
+    return Article, article_references
+
+
+class ManyToManyRelationshipsTestCase(TestCase):
+    def create_models(self):
+        self.Article, self.Tag, self.article_tag = create_article_tag_models(self.Model)
 
     def test_version_relations(self):
         article = self.Article()
@@ -71,13 +162,38 @@ class ManyToManyRelationshipsTestCase(TestCase):
         self.session.commit()
         assert len(article.versions[0].tags) == 1
 
+    def test_association_version_keeps_created_date(self):
+        article = self.Article(name="Some article")
+        article.tags.append(self.Tag(name="some tag"))
+        self.session.add(article)
+        self.session.commit()
+        article_tag_version = versioning_manager.version_table_map[self.article_tag]
+        created_date = self.session.scalar(sa.select(self.article_tag.c.created_date))
+        assert created_date is not None
+        assert self.session.scalar(sa.select(article_tag_version.c.created_date)) == created_date
+
+    def test_only_association_table_is_tracked_from_sql_operations(self):
+        assert versioning_manager.sql_tracked_table_names == {self.article_tag.fullname}
+
+    def test_version_relation_does_not_query_parent_version_table(self):
+        article = self.Article(name="Some article")
+        article.tags.append(self.Tag(name="some tag"))
+        self.session.add(article)
+        self.session.commit()
+        version = article.versions[0]
+        query_count = len(QueryPool.queries)
+        assert len(version.tags) == 1
+        # association version table already holds the parent keys, so only the
+        # association and remote version tables should be read
+        assert query_count + 1 == len(QueryPool.queries)
+        assert "article_version" not in QueryPool.queries[-1]
+
     def test_unrelated_change(self):
         tag1 = self.Tag(name="some tag")
         tag2 = self.Tag(name="some tag2")
 
-        self.session.add(tag1)
-        self.session.add(tag2)
-        self.session.commit()
+        self.session.add_all([tag1, tag2])
+        self.bump_version()
 
         article1 = self.Article(
             name="Some article",
@@ -86,14 +202,14 @@ class ManyToManyRelationshipsTestCase(TestCase):
         self.session.add(article1)
         article1.tags.append(tag1)
 
-        self.session.commit()
+        self.bump_version()
 
         article2 = self.Article()
         article2.name = "Some article2"
         self.session.add(article2)
         article2.tags.append(tag1)
 
-        self.session.commit()
+        self.bump_version()
 
         article1.name = "Some other name"
         self.session.commit()
@@ -111,6 +227,24 @@ class ManyToManyRelationshipsTestCase(TestCase):
         self.session.commit()
         assert len(article.versions[0].tags) == 2
 
+    def test_bulk_association_insert(self):
+        article = self.Article(name="Some article")
+        tags = [self.Tag(name="some tag"), self.Tag(name="another tag")]
+        self.session.add_all([article, *tags])
+        self.session.flush()
+        self.session.execute(
+            sa.insert(self.article_tag),
+            [{"article_id": article.id, "tag_id": tag.id} for tag in tags],
+        )
+        # NOTE: association versions are only written on flush, so we modify the article to make sure
+        #       the commit flushes the tracked association rows
+        article.name = "Updated article"
+        self.session.commit()
+        assert article.versions.count() == 1
+        assert len(article.versions[0].tags) == 2
+        article_tag_version = versioning_manager.version_table_map[self.article_tag]
+        assert self.session.scalar(sa.select(sa.func.count()).select_from(article_tag_version)) == 2
+
     def test_collection_with_multiple_entries(self):
         article = self.Article()
         article.name = "Some article"
@@ -140,8 +274,7 @@ class ManyToManyRelationshipsTestCase(TestCase):
         article.content = "Some content"
         tag = self.Tag(name="some tag")
         tag2 = self.Tag(name="another tag")
-        article.tags.append(tag)
-        article.tags.append(tag2)
+        article.tags = [tag, tag2]
         self.session.add(article)
         self.session.commit()
         article.tags.remove(tag)
@@ -186,36 +319,59 @@ class ManyToManyRelationshipsTestCase(TestCase):
         tag1 = self.Tag(name="some tag")
         article.tags.append(tag1)
         self.session.add(article)
-        self.session.commit()
+        self.bump_version()
 
         # update article and tag, add a 2nd tag
         tag2 = self.Tag(name="some other tag")
         article.tags.append(tag2)
         tag1.name = "updated tag1"
         article.name = "updated article"
-        self.session.commit()
+        self.bump_version()
 
         # update article and first tag only
         tag1.name = "updated tag1 x2"
         article.name = "updated article x2"
         self.session.commit()
 
-        assert len(article.versions[0].tags) == 1
-        assert article.versions[0].tags[0] is tag1.versions[0]
+        # load every versions list once, each block below then only queries the version relation
+        with self.bounded_queries(6):
+            article_versions = article.versions.all()
+            tag1_versions = tag1.versions.all()
+            tag2_versions = tag2.versions.all()
+
+        with self.bounded_queries(1):
+            tags = article_versions[0].tags
+            assert len(tags) == 1
+            assert tags[0] is tag1_versions[0]
 
-        assert len(article.versions[1].tags) == 2
-        assert tag1.versions[1] in article.versions[1].tags
-        assert tag2.versions[0] in article.versions[1].tags
+        with self.bounded_queries(1):
+            tags = article_versions[1].tags
+            assert len(tags) == 2
+            assert tag1_versions[1] in tags
+            assert tag2_versions[0] in tags
 
-        assert len(article.versions[2].tags) == 2
-        assert tag1.versions[2] in article.versions[2].tags
-        assert tag2.versions[0] in article.versions[2].tags
+        with self.bounded_queries(1):
+            tags = article_versions[2].tags
+            assert len(tags) == 2
+            assert tag1_versions[2] in tags
+            assert tag2_versions[0] in tags
 
 
 create_test_cases(ManyToManyRelationshipsTestCase)
 
 
 class TestManyToManyRelationshipWithViewOnly(TestCase):
+    def create_models(self):
+        self.Article, self.Tag, self.article_tag = create_article_tag_models(self.Model, viewonly=True)
+
+    def test_does_not_add_association_table_to_manager_registry(self):
+        assert self.article_tag not in versioning_manager.version_table_map
+
+    def test_does_not_reflect_relationship_to_version_class(self):
+        assert not hasattr(self.TagVersion, "articles")
+
+
+class TestManyToManyRelationshipWithViewOnlyToNonVersionedClass(TestCase):
     def create_models(self):
         class Article(self.Model):
             __tablename__ = "article"
@@ -229,67 +385,37 @@ class TestManyToManyRelationshipWithViewOnly(TestCase):
         article_tag = sa.Table(
             "article_tag",
             self.Model.metadata,
-            sa.Column(
-                "article_id",
-                sa.Integer,
-                sa.ForeignKey("article.id"),
-                primary_key=True,
-            ),
+            sa.Column("article_id", sa.Integer, sa.ForeignKey("article.id"), primary_key=True),
             sa.Column("tag_id", sa.Integer, sa.ForeignKey("tag.id"), primary_key=True),
         )
 
         class Tag(self.Model):
             __tablename__ = "tag"
-            __versioned__ = {"base_classes": (self.Model,)}
 
             id = sa.Column(
                 sa.Integer, sa.Sequence(f"{__tablename__}_seq", start=1), autoincrement=True, primary_key=True
             )
             name = sa.Column(sa.Unicode(255))
 
-        Tag.articles = sa.orm.relationship(Article, secondary=article_tag, viewonly=True)
+        Article.tags = sa.orm.relationship(Tag, secondary=article_tag, viewonly=True)
 
-        self.article_tag = article_tag
         self.Article = Article
         self.Tag = Tag
+        self.article_tag = article_tag
 
-    def test_does_not_add_association_table_to_manager_registry(self):
-        assert self.article_tag not in versioning_manager.version_table_map
+    def test_reflects_relationship_to_version_class(self):
+        article = self.Article(name="Some article")
+        tag = self.Tag(name="some tag")
+        self.session.add_all([article, tag])
+        self.session.flush()
+        self.session.execute(sa.insert(self.article_tag).values(article_id=article.id, tag_id=tag.id))
+        self.session.commit()
+        assert article.versions[0].tags == [tag]
 
 
 class TestManyToManySelfReferential(TestCase):
     def create_models(self):
-        class Article(self.Model):
-            __tablename__ = "article"
-            __versioned__ = {}
-
-            id = sa.Column(
-                sa.Integer, sa.Sequence(f"{__tablename__}_seq", start=1), autoincrement=True, primary_key=True
-            )
-            name = sa.Column(sa.Unicode(255))
-
-        article_references = sa.Table(
-            "article_references",
-            self.Model.metadata,
-            sa.Column(
-                "referring_id",
-                sa.Integer,
-                sa.ForeignKey("article.id"),
-                primary_key=True,
-            ),
-            sa.Column("referred_id", sa.Integer, sa.ForeignKey("article.id"), primary_key=True),
-        )
-
-        Article.references = sa.orm.relationship(
-            Article,
-            secondary=article_references,
-            primaryjoin=Article.id == article_references.c.referring_id,
-            secondaryjoin=Article.id == article_references.c.referred_id,
-            backref="cited_by",
-        )
-
-        self.Article = Article
-        self.referenced_articles_table = article_references
+        self.Article, self.referenced_articles_table = create_self_referential_article_models(self.Model)
 
     def test_single_insert(self):
         article = self.Article(name="article")
@@ -298,11 +424,13 @@ class TestManyToManySelfReferential(TestCase):
         self.session.add(article)
         self.session.commit()
 
-        assert len(article.versions[0].references) == 1
-        assert reference1.versions[0] in article.versions[0].references
+        references = article.versions[0].references
+        assert len(references) == 1
+        assert reference1.versions[0] in references
 
-        assert len(reference1.versions[0].cited_by) == 1
-        assert article.versions[0] in reference1.versions[0].cited_by
+        cited_by = reference1.versions[0].cited_by
+        assert len(cited_by) == 1
+        assert article.versions[0] in cited_by
 
     def test_multiple_inserts_over_multiple_transactions(self):
         # create 1 article with 1 reference
@@ -310,165 +438,68 @@ class TestManyToManySelfReferential(TestCase):
         reference1 = self.Article(name="reference 1")
         article.references.append(reference1)
         self.session.add(article)
-        self.session.commit()
+        self.bump_version()
 
         # update existing, add a 2nd reference
         article.name = "Updated article"
         reference1.name = "Updated reference 1"
         reference2 = self.Article(name="reference 2")
         article.references.append(reference2)
-        self.session.commit()
+        self.bump_version()
 
         # update only the article and reference 1
         article.name = "Updated article x2"
         reference1.name = "Updated reference 1 x2"
         self.session.commit()
 
-        assert len(article.versions[1].references) == 2
-        assert reference1.versions[1] in article.versions[1].references
-        assert reference2.versions[0] in article.versions[1].references
+        # load every versions list once, each block below then only queries the version relation
+        with self.bounded_queries(6):
+            article_versions = article.versions.all()
+            reference1_versions = reference1.versions.all()
+            reference2_versions = reference2.versions.all()
 
-        assert len(reference1.versions[1].cited_by) == 1
-        assert article.versions[1] in reference1.versions[1].cited_by
+        with self.bounded_queries(1):
+            references = article_versions[1].references
+            assert len(references) == 2
+            assert reference1_versions[1] in references
+            assert reference2_versions[0] in references
 
-        assert len(reference2.versions[0].cited_by) == 1
-        assert article.versions[1] in reference2.versions[0].cited_by
+        with self.bounded_queries(1):
+            cited_by = reference1_versions[1].cited_by
+            assert len(cited_by) == 1
+            assert article_versions[1] in cited_by
 
-        assert len(article.versions[2].references) == 2
-        assert reference1.versions[2] in article.versions[2].references
-        assert reference2.versions[0] in article.versions[2].references
+        with self.bounded_queries(1):
+            cited_by = reference2_versions[0].cited_by
+            assert len(cited_by) == 1
+            assert article_versions[1] in cited_by
 
-        assert len(reference1.versions[2].cited_by) == 1
-        assert article.versions[2] in reference1.versions[2].cited_by
+        with self.bounded_queries(1):
+            references = article_versions[2].references
+            assert len(references) == 2
+            assert reference1_versions[2] in references
+            assert reference2_versions[0] in references
+
+        with self.bounded_queries(1):
+            cited_by = reference1_versions[2].cited_by
+            assert len(cited_by) == 1
+            assert article_versions[2] in cited_by
 
 
 @mark.skipif(os.environ.get("DB") == "sqlite", reason="sqlite doesn't have a concept of schema")
+@mark.usefixtures("setup_other_schema")
 class TestManyToManySelfReferentialInOtherSchema(TestManyToManySelfReferential):
     def create_models(self):
-        class Article(self.Model):
-            __tablename__ = "article"
-            __versioned__ = {}
-            __table_args__ = {"schema": "other"}
-
-            id = sa.Column(
-                sa.Integer, sa.Sequence(f"{__tablename__}_seq", start=1), autoincrement=True, primary_key=True
-            )
-            name = sa.Column(sa.Unicode(255))
-
-        article_references = sa.Table(
-            "article_references",
-            self.Model.metadata,
-            sa.Column(
-                "referring_id",
-                sa.Integer,
-                sa.ForeignKey("other.article.id"),
-                primary_key=True,
-            ),
-            sa.Column("referred_id", sa.Integer, sa.ForeignKey("other.article.id"), primary_key=True),
-            schema="other",
-        )
-
-        Article.references = sa.orm.relationship(
-            Article,
-            secondary=article_references,
-            primaryjoin=Article.id == article_references.c.referring_id,
-            secondaryjoin=Article.id == article_references.c.referred_id,
-            backref="cited_by",
+        self.Article, self.referenced_articles_table = create_self_referential_article_models(
+            self.Model, schema="other"
         )
 
-        self.Article = Article
-        self.referenced_articles_table = article_references
-
-    def create_tables(self):
-        try:
-            self.connection.execute(sa.text("DROP SCHEMA IF EXISTS other"))
-            self.connection.execute(sa.text("CREATE SCHEMA other"))
-        except sa.exc.DatabaseError:  # pragma: no cover
-            try:
-                # Create a User for Oracle DataBase as it does not have concept of schema
-                # ref: https://stackoverflow.com/questions/10994414/missing-authorization-clause-while-creating-schema # noqa E501
-                self.connection.execute(sa.text("CREATE USER other identified by other"))
-                # need to give privilege to create table to this new user
-                # ref: https://stackoverflow.com/questions/27940522/no-privileges-on-tablespace-users
-                self.connection.execute(sa.text("GRANT UNLIMITED TABLESPACE TO other"))
-            except sa.exc.DatabaseError as dbe:
-                if (
-                    "ORA-01920: user name 'OTHER' conflicts with another user or role name"
-                    not in dbe.__str__()
-                ):
-                    # NOTE: prior to oracle 23c we don't have concept of if not exists
-                    #       so we just try to create if fails we continue
-                    raise
-        finally:
-            self.connection.commit()
-
-        TestManyToManySelfReferential.create_tables(self)
-
 
 @mark.skipif(os.environ.get("DB") == "sqlite", reason="sqlite doesn't have a concept of schema")
+@mark.usefixtures("setup_other_schema")
 class TestManyToManyRelationshipsInOtherSchemaTestCase(ManyToManyRelationshipsTestCase):
     def create_models(self):
-        class Article(self.Model):
-            __tablename__ = "article"
-            __versioned__ = {"base_classes": (self.Model,)}
-            __table_args__ = {"schema": "other"}
-
-            id = sa.Column(
-                sa.Integer, sa.Sequence(f"{__tablename__}_seq", start=1), autoincrement=True, primary_key=True
-            )
-            name = sa.Column(sa.Unicode(255))
-
-        article_tag = sa.Table(
-            "article_tag",
-            self.Model.metadata,
-            sa.Column(
-                "article_id",
-                sa.Integer,
-                sa.ForeignKey("other.article.id"),
-                primary_key=True,
-            ),
-            sa.Column("tag_id", sa.Integer, sa.ForeignKey("other.tag.id"), primary_key=True),
-            schema="other",
-        )
-
-        class Tag(self.Model):
-            __tablename__ = "tag"
-            __versioned__ = {"base_classes": (self.Model,)}
-            __table_args__ = {"schema": "other"}
-
-            id = sa.Column(
-                sa.Integer, sa.Sequence(f"{__tablename__}_seq", start=1), autoincrement=True, primary_key=True
-            )
-            name = sa.Column(sa.Unicode(255))
-
-        Tag.articles = sa.orm.relationship(Article, secondary=article_tag, backref="tags")
-
-        self.Article = Article
-        self.Tag = Tag
-
-    def create_tables(self):
-        try:
-            self.connection.execute(sa.text("DROP SCHEMA IF EXISTS other"))
-            self.connection.execute(sa.text("CREATE SCHEMA other"))
-        except sa.exc.DatabaseError:
-            try:
-                # Create a User for Oracle DataBase as it does not have concept of schema
-                # ref: https://stackoverflow.com/questions/10994414/missing-authorization-clause-while-creating-schema # noqa E501
-                self.connection.execute(sa.text("CREATE USER other identified by other"))
-                # need to give privilege to create table to this new user
-                # ref: https://stackoverflow.com/questions/27940522/no-privileges-on-tablespace-users
-                self.connection.execute(sa.text("GRANT UNLIMITED TABLESPACE TO other"))  # pragma: no cover
-            except sa.exc.DatabaseError as dbe:  # pragma: no cover
-                if (
-                    "ORA-01920: user name 'OTHER' conflicts with another user or role name"
-                    not in dbe.__str__()
-                ):
-                    # NOTE: prior to oracle 23c we don't have concept of if not exists
-                    #       so we just try to create if fails we continue
-                    raise
-        finally:
-            self.connection.commit()
-        ManyToManyRelationshipsTestCase.create_tables(self)
+        self.Article, self.Tag, self.article_tag = create_article_tag_models(self.Model, schema="other")
 
 
 create_test_cases(TestManyToManyRelationshipsInOtherSchemaTestCase)
@@ -43,6 +43,7 @@ class TestVersionedModelWithoutVersioning(TestCase):
     def test_does_add_objects_to_unit_of_work(self):
         self.session.add(self.TextItem())
         self.session.commit()
+        assert self.session.query(versioning_manager.transaction_cls).count() == 0
 
 
 class TestWithUnknownUserClass(object):
@@ -102,6 +103,30 @@ class TestWithCreateModelsAsFalse(TestCase):
         assert version_table(self.Article.__table__).name == "article_version"
 
 
+class TestWithVersionsLazyOption(TestCase):
+    def create_models(self):
+        class Article(self.Model):
+            __tablename__ = "article"
+            __versioned__ = {"versions_lazy": "selectin"}
+
+            id = sa.Column(
+                sa.Integer, sa.Sequence(f"{__tablename__}_seq", start=1), autoincrement=True, primary_key=True
+            )
+            name = sa.Column(sa.Unicode(255), nullable=False)
+
+        self.Article = Article
+
+    def test_loads_versions_as_list(self):
+        article = self.Article(name="Some article")
+        self.session.add(article)
+        self.session.commit()
+        article.name = "Updated name"
+        self.session.commit()
+        assert isinstance(article.versions, list)
+        assert len(article.versions) == 2
+        assert article.versions[-1].name == "Updated name"
+
+
 class TestWithoutAnyVersionedModels(TestCase):
     def create_models(self):
         class Article(self.Model):